@@ -1,11 +1,16 @@
+import io
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import simpy
-import random
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernel also runs as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 # --- Styling ---
 st.set_page_config(page_title="Smart Supply Chain Simulator", layout="wide")
 st.markdown("""
@@ -25,15 +30,42 @@ st.markdown("""
     </style>
     <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
 """, unsafe_allow_html=True)
-sns.set_theme(style="darkgrid", palette="mako")
-plt.style.use("dark_background")
+
+# --- Simulation Constants ---
+DELIVERY_TYPES = ['Standard', 'Express', 'Same-Day']
+DELIVERY_WEIGHTS = [0.6, 0.3, 0.1]
+DELIVERY_MULTIPLIERS = np.array([1.0, 0.8, 0.5], dtype=np.float32)  # indexed by delivery type code
+
+# --- Simulation Kernel ---
+@njit(cache=True)
+def _run_stock_sim(qty, base_profit, adj_delay, base_delay, is_ret, initial_stock):
+    """Sequential stock bookkeeping. Status codes: 0=Delivered, 1=Returned, 2=Stockout."""
+    n = qty.shape[0]
+    status = np.zeros(n, dtype=np.int8)
+    profit = np.empty(n)
+    remaining = np.empty(n)
+    stock = initial_stock
+    stockouts = 0
+    for i in range(n):
+        final_profit = base_profit[i] - 5 * max(0, adj_delay[i] - base_delay[i])
+        if stock < qty[i]:
+            stockouts += 1
+            status[i] = 2
+            final_profit = 0.0
+        else:
+            stock -= qty[i]
+            if is_ret[i]:
+                status[i] = 1
+                final_profit = -abs(final_profit)
+        profit[i] = final_profit
+        remaining[i] = stock
+    return status, profit, remaining, stockouts
 
 # --- Simulation Class ---
 class AdvancedDeliverySimulator:
-    def __init__(self, env, orders_df, return_rate, delay_min, delay_max):
-        self.env = env
+    def __init__(self, orders_df, return_rate, delay_min, delay_max, seed=None):
         self.orders = orders_df
-        self.log = []
+        self.rng = np.random.default_rng(seed)
         self.return_rate = return_rate / 100
         self.delay_min = delay_min
         self.delay_max = delay_max
@@ -42,74 +74,105 @@ class AdvancedDeliverySimulator:
         self.initial_stock = 10000
         self.current_stock = self.initial_stock
         self.stockouts = 0
-        self.daily_stock_levels = {}
-
-    def simulate_order(self, row):
-        order_id = row['Order Id']
-        base_delay = random.randint(self.delay_min, self.delay_max)
-        quantity = row['Order Item Quantity']
-        unit_price = row['Product Price']
-        base_profit = row['Order Profit Per Order']
-
-        delivery_type = random.choices(['Standard', 'Express', 'Same-Day'], weights=[0.6, 0.3, 0.1])[0]
-        multiplier = {'Standard': 1.0, 'Express': 0.8, 'Same-Day': 0.5}
-        adjusted_delay = int(base_delay * multiplier[delivery_type])
-
-        yield self.env.timeout(adjusted_delay)
-
-        is_returned = random.random() < self.return_rate
-        delay_penalty = -5 * max(0, adjusted_delay - base_delay)
-        final_status = "Delivered"
-        final_profit = base_profit + delay_penalty
-
-        if self.current_stock < quantity:
-            self.stockouts += 1
-            final_status = "Stockout"
-            final_profit = 0
-            quantity = 0
-        else:
-            self.current_stock -= quantity
-            self.total_stock_used += quantity
-
-        if is_returned and final_status == "Delivered":
-            final_status = "Returned"
-            final_profit = -abs(final_profit)
-
-        self.cumulative_profit += final_profit
 
-        self.daily_stock_levels[self.env.now] = self.current_stock
-
-        self.log.append({
-            "Sim Time": self.env.now,
-            "Order Id": order_id,
-            "Delivery Type": delivery_type,
-            "Status": final_status,
-            "Profit": final_profit,
+    def run(self):
+        # Orders never interact except through the shared stock, so all random
+        # variates are drawn up front in one vectorized pass.
+        n = len(self.orders)
+        quantity = self.orders['Order Item Quantity'].to_numpy(dtype=float)
+        base_profit = self.orders['Order Profit Per Order'].to_numpy(dtype=float)
+
+        base_delay = self.rng.integers(self.delay_min, self.delay_max + 1, n, dtype=np.int32)
+        delivery_idx = self.rng.choice(len(DELIVERY_TYPES), size=n, p=DELIVERY_WEIGHTS)
+        adjusted_delay = (base_delay * DELIVERY_MULTIPLIERS[delivery_idx]).astype(np.int32)
+        is_returned = self.rng.random(n) < self.return_rate
+
+        # Every order starts at time 0 and completes after its own delay, so the
+        # event list reduces to a stable sort by delay.
+        event_order = np.argsort(adjusted_delay, kind='stable')
+        quantity, base_profit = quantity[event_order], base_profit[event_order]
+        base_delay, adjusted_delay = base_delay[event_order], adjusted_delay[event_order]
+        delivery_idx, is_returned = delivery_idx[event_order], is_returned[event_order]
+        order_ids = self.orders['Order Id'].to_numpy()[event_order]
+
+        # Stockouts depend on the order in which stock is consumed, so the
+        # bookkeeping runs as a compiled sequential loop.
+        status_codes, profit, remaining, self.stockouts = _run_stock_sim(
+            quantity, base_profit, adjusted_delay, base_delay, is_returned, float(self.initial_stock)
+        )
+        stock_used = np.where(status_codes == 2, 0, quantity).astype(np.int32)
+        cumulative_profit = np.cumsum(profit)
+
+        self.total_stock_used = int(stock_used.sum())
+        self.current_stock = remaining[-1] if n else self.initial_stock
+        self.cumulative_profit = cumulative_profit[-1] if n else 0
+
+        return pd.DataFrame({
+            "Sim Time": adjusted_delay,
+            "Order Id": order_ids,
+            "Delivery Type": pd.Categorical.from_codes(delivery_idx.astype(np.int8), categories=DELIVERY_TYPES),
+            "Status": pd.Categorical.from_codes(status_codes, categories=['Delivered', 'Returned', 'Stockout']),
+            "Profit": profit.astype(np.float32),
             "Delay Days": adjusted_delay,
-            "Cumulative Profit": self.cumulative_profit,
-            "Holding Cost": quantity * adjusted_delay * 0.2,
-            "Stock Used": quantity,
-            "Remaining Stock": self.current_stock
+            "Cumulative Profit": cumulative_profit.astype(np.float32),
+            "Holding Cost": (stock_used * adjusted_delay * 0.2).astype(np.float32),
+            "Stock Used": stock_used,
+            "Remaining Stock": remaining.astype(np.int32),
         })
 
-    def run(self):
-        processes = [self.env.process(self.simulate_order(row)) for _, row in self.orders.iterrows()]
-        for p in processes:
-            yield p
+# --- Data Loading ---
+ORDER_COLUMNS = ['Order Id', 'Days for shipping (real)', 'Order Profit Per Order', 'Order Item Quantity', 'Product Price']
+
+ORDER_DTYPES = {
+    'Order Id': 'int32',
+    'Days for shipping (real)': 'int16',
+    'Order Profit Per Order': 'float32',
+    'Order Item Quantity': 'int32',
+    'Product Price': 'float32',
+}
+
+def downcast_orders(df):
+    dtypes = {}
+    for col, dtype in ORDER_DTYPES.items():
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            continue
+        if np.issubdtype(np.dtype(dtype), np.integer):
+            # Integer casts neither hold NaN nor raise on overflow, so check first
+            info = np.iinfo(dtype)
+            if values.isna().any() or values.min() < info.min or values.max() > info.max:
+                continue
+        dtypes[col] = dtype
+    return df.astype(dtypes)
+
+@st.cache_data(show_spinner=False)
+def load_orders(file_bytes):
+    try:
+        df = pd.read_csv(io.BytesIO(file_bytes), engine='pyarrow', encoding='ISO-8859-1', usecols=ORDER_COLUMNS)
+    except (ImportError, ValueError):  # pyarrow missing or unable to parse the file
+        df = pd.read_csv(io.BytesIO(file_bytes), encoding='ISO-8859-1', usecols=ORDER_COLUMNS)
+    df['Days for shipping (real)'] = pd.to_numeric(df['Days for shipping (real)'], errors='coerce')
+    df['Order Profit Per Order'] = pd.to_numeric(df['Order Profit Per Order'], errors='coerce')
+    df['Order Item Quantity'] = pd.to_numeric(df['Order Item Quantity'], errors='coerce')
+    df['Product Price'] = pd.to_numeric(df['Product Price'], errors='coerce')
+    df = df.dropna(subset=['Days for shipping (real)', 'Order Profit Per Order', 'Order Id'])
+    return downcast_orders(df)
+
+@st.cache_data(show_spinner=False)
+def sample_orders(file_bytes, num_orders):
+    return load_orders(file_bytes).sample(n=num_orders, ignore_index=True, random_state=0)
 
 # --- Streamlit UI ---
+PLOT_SAMPLE_SIZE = 3000  # rows per category drawn for violin plots
+
 st.title("Smart Supply Chain CoPilot")
 
 st.sidebar.header("Simulation Controls")
 uploaded_file = st.sidebar.file_uploader("Upload your CSV file", type=["csv"])
 
 if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file, encoding='ISO-8859-1')
-    df['Days for shipping (real)'] = pd.to_numeric(df['Days for shipping (real)'], errors='coerce')
-    df['Order Profit Per Order'] = pd.to_numeric(df['Order Profit Per Order'], errors='coerce')
-    df['Order Item Quantity'] = pd.to_numeric(df['Order Item Quantity'], errors='coerce')
-    df['Product Price'] = pd.to_numeric(df['Product Price'], errors='coerce')
-    df = df.dropna(subset=['Days for shipping (real)', 'Order Profit Per Order', 'Order Id'])
+    file_bytes = uploaded_file.getvalue()
+    df = load_orders(file_bytes)
 
     num_orders = st.sidebar.slider("Number of Orders", 100, min(100000, len(df)), 1000, step=100)
     return_rate = st.sidebar.slider("Return Rate (%)", 0, 50, 10)
@@ -117,24 +180,26 @@ if uploaded_file is not None:
     delay_max = st.sidebar.slider("Maximum Delay (Days)", 5, 15, 10)
 
     if st.sidebar.button("Run Simulation"):
-        sample_orders = df.sample(num_orders).reset_index(drop=True)
-        env = simpy.Environment()
-        sim = AdvancedDeliverySimulator(env, sample_orders, return_rate, delay_min, delay_max)
-        env.process(sim.run())
-        env.run()
-        result_df = pd.DataFrame(sim.log)
+        # Plotting libraries are only needed once a simulation runs
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        sns.set_theme(style="darkgrid", palette="mako")
+        plt.style.use("dark_background")
+
+        orders = sample_orders(file_bytes, num_orders)
+        sim = AdvancedDeliverySimulator(orders, return_rate, delay_min, delay_max)
+        result_df = sim.run()
 
         # --- Metrics ---
         st.header("📊 Key Metrics")
+        delivered_n, returned_n, _ = np.bincount(result_df["Status"].cat.codes.to_numpy(), minlength=3)
         col1, col2, col3, col4 = st.columns(4)
         with col1:
             st.metric("Total Profit ($)", f"{sim.cumulative_profit:,.2f}")
         with col2:
-            delivered = result_df[result_df["Status"] == "Delivered"]
-            st.metric("Successful Deliveries (%)", f"{len(delivered) / num_orders * 100:.2f}%")
+            st.metric("Successful Deliveries (%)", f"{delivered_n / num_orders * 100:.2f}%")
         with col3:
-            returned = result_df[result_df["Status"] == "Returned"]
-            st.metric("Returns (%)", f"{len(returned) / num_orders * 100:.2f}%")
+            st.metric("Returns (%)", f"{returned_n / num_orders * 100:.2f}%")
         with col4:
             st.metric("Stockouts", sim.stockouts)
 
@@ -145,10 +210,12 @@ if uploaded_file is not None:
 
         # --- Safety Stock & ROP ---
         st.header("📦 Safety Stock & Reorder Analysis")
-        daily_usage = result_df.groupby("Sim Time")["Stock Used"].sum()
+        sim_time = result_df["Sim Time"].to_numpy()
+        daily_usage = np.bincount(sim_time, weights=result_df["Stock Used"].to_numpy())
+        daily_usage = daily_usage[np.bincount(sim_time) > 0]  # only days with orders, as groupby would
         lead_time = (delay_min + delay_max) / 2
         avg_daily_usage = daily_usage.mean()
-        std_dev_usage = daily_usage.std()
+        std_dev_usage = daily_usage.std(ddof=1)
         safety_stock = std_dev_usage * np.sqrt(lead_time)
         reorder_point = (avg_daily_usage * lead_time) + safety_stock
 
@@ -161,15 +228,17 @@ if uploaded_file is not None:
             st.metric("Reorder Point", f"{reorder_point:.0f} units")
 
         st.markdown("<p style='font-size:14px;'>Visualizing stock levels across the simulation vs calculated reorder point.</p>", unsafe_allow_html=True)
-        fig_stock = plt.figure(figsize=(12, 5))
-        stock_series = pd.Series(sim.daily_stock_levels).sort_index()
-        stock_series.plot(label="Stock Level", color='cyan')
-        plt.axhline(y=reorder_point, color='red', linestyle='--', label="Reorder Point")
-        plt.axhline(y=safety_stock, color='orange', linestyle='--', label="Safety Stock")
-        plt.xlabel("Simulation Time (Days)")
-        plt.ylabel("Stock Level")
-        plt.legend()
+        fig_stock, ax_stock = plt.subplots(figsize=(12, 5))
+        daily_df = result_df.drop_duplicates("Sim Time", keep="last")
+        stock_series = daily_df.set_index("Sim Time")["Remaining Stock"]
+        stock_series.plot(ax=ax_stock, label="Stock Level", color='cyan')
+        ax_stock.axhline(y=reorder_point, color='red', linestyle='--', label="Reorder Point")
+        ax_stock.axhline(y=safety_stock, color='orange', linestyle='--', label="Safety Stock")
+        ax_stock.set_xlabel("Simulation Time (Days)")
+        ax_stock.set_ylabel("Stock Level")
+        ax_stock.legend()
         st.pyplot(fig_stock)
+        plt.close(fig_stock)
 
         if stock_series.min() <= reorder_point:
             st.warning("⚠️ Stock level dipped below the reorder point. Replenishment needed!")
@@ -178,43 +247,54 @@ if uploaded_file is not None:
         st.header("📈 Visual Insights")
 
         st.subheader("Cumulative Profit Over Time")
-        fig1 = plt.figure(figsize=(12, 5))
-        sns.lineplot(data=result_df, x="Sim Time", y="Cumulative Profit", color='#76D7C4', linewidth=2.5)
+        fig1, ax1 = plt.subplots(figsize=(12, 5))
+        sns.lineplot(data=daily_df, x="Sim Time", y="Cumulative Profit", color='#76D7C4', linewidth=2.5, ax=ax1)
         st.pyplot(fig1)
+        plt.close(fig1)
 
         st.subheader("Sales Volume Over Time")
-        fig2 = plt.figure(figsize=(12, 5))
-        sns.histplot(data=result_df, x="Sim Time", bins=30, kde=True, color='#85C1E9')
+        fig2, ax2 = plt.subplots(figsize=(12, 5))
+        sns.histplot(data=result_df, x="Sim Time", bins=30, kde=True, color='#85C1E9', ax=ax2)
         st.pyplot(fig2)
+        plt.close(fig2)
 
         st.subheader("Profit Distribution by Delivery Type")
-        fig3 = plt.figure(figsize=(10, 5))
-        sns.violinplot(x="Delivery Type", y="Profit", data=result_df, inner="quartile", palette="magma")
+        fig3, ax3 = plt.subplots(figsize=(10, 5))
+        violin_df = pd.concat([
+            group.sample(min(len(group), PLOT_SAMPLE_SIZE), random_state=0)
+            for _, group in result_df.groupby("Delivery Type", observed=True)
+        ])
+        sns.violinplot(x="Delivery Type", y="Profit", data=violin_df, inner="quartile", palette="magma", ax=ax3)
         st.pyplot(fig3)
+        plt.close(fig3)
 
         st.subheader("Inventory Holding Cost Distribution")
-        fig4 = plt.figure(figsize=(10, 5))
-        sns.histplot(result_df["Holding Cost"], kde=True, bins=30, color='#F1948A')
+        fig4, ax4 = plt.subplots(figsize=(10, 5))
+        sns.histplot(result_df["Holding Cost"], kde=True, bins=30, color='#F1948A', ax=ax4)
         st.pyplot(fig4)
+        plt.close(fig4)
 
         st.subheader("Delay vs Profit Heatmap")
-        fig5 = plt.figure(figsize=(10, 6))
-        sns.histplot(data=result_df, x="Delay Days", y="Profit", bins=30, cmap="viridis")
+        fig5, ax5 = plt.subplots(figsize=(10, 6))
+        sns.histplot(data=result_df, x="Delay Days", y="Profit", bins=30, cmap="viridis", ax=ax5)
         st.pyplot(fig5)
+        plt.close(fig5)
 
         st.subheader("Delivery Status Breakdown")
-        fig6 = plt.figure(figsize=(8, 4))
-        sns.countplot(data=result_df, x="Status", palette="Set2")
+        fig6, ax6 = plt.subplots(figsize=(8, 4))
+        sns.countplot(data=result_df, x="Status", palette="Set2", ax=ax6)
         st.pyplot(fig6)
+        plt.close(fig6)
 
         st.subheader("Total Stock Used vs Initial Stock")
-        fig7 = plt.figure(figsize=(8, 5))
+        fig7, ax7 = plt.subplots(figsize=(8, 5))
         stock_data = pd.DataFrame({
             "Stock": ["Initial", "Used", "Remaining"],
             "Units": [sim.initial_stock, sim.total_stock_used, sim.current_stock]
         })
-        sns.barplot(data=stock_data, x="Stock", y="Units", palette="crest")
+        sns.barplot(data=stock_data, x="Stock", y="Units", palette="crest", ax=ax7)
         st.pyplot(fig7)
+        plt.close(fig7)
 
 else:
     st.info("Upload a CSV file using the sidebar to start the simulation.")
@@ -1,9 +1,44 @@
 # prophet_forecast.py
+import io
 import pandas as pd
 import streamlit as st
-from prophet import Prophet
-import holidays
-import matplotlib.pyplot as plt
+
+def holiday_flags(dates):
+    import holidays
+
+    # Build the holiday calendar once for the covered years and match by date
+    years = range(dates.dt.year.min(), dates.dt.year.max() + 1)
+    hol_dates = pd.to_datetime(list(holidays.India(years=years).keys()))
+    return dates.dt.normalize().isin(hol_dates).astype('int8')
+
+@st.cache_data(show_spinner=False)
+def load_demand(file_bytes):
+    df = pd.read_csv(io.BytesIO(file_bytes), encoding="ISO-8859-1")
+    df['Order Date'] = pd.to_datetime(df['Order Date'])
+    df = df[['Order Date', 'Order Item Quantity']].dropna()
+    df = df.rename(columns={"Order Date": "ds", "Order Item Quantity": "y"})
+    df = df.groupby('ds', as_index=False)['y'].sum()
+
+    # Add holiday flag using India holidays (customize as needed)
+    df['holiday'] = holiday_flags(df['ds'])
+    return df
+
+@st.cache_resource(show_spinner="Fitting Prophet...")
+def fit_prophet(file_bytes):
+    from prophet import Prophet
+
+    # Prophet model with holidays as regressor
+    m = Prophet()
+    m.add_regressor('holiday')
+    m.fit(load_demand(file_bytes))
+    return m
+
+@st.cache_data(show_spinner=False)
+def predict_demand(file_bytes, periods=30):
+    m = fit_prophet(file_bytes)
+    future = m.make_future_dataframe(periods=periods)
+    future['holiday'] = holiday_flags(future['ds'])
+    return m.predict(future)
 
 st.set_page_config(page_title="Demand Forecasting", layout="wide")
 st.title("📈 Demand Forecasting with Prophet")
@@ -11,36 +46,25 @@ st.title("📈 Demand Forecasting with Prophet")
 uploaded_file = st.file_uploader("Upload CSV with 'Order Date' and 'Order Item Quantity'", type=["csv"])
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file, encoding="ISO-8859-1")
-
-    try:
-        df['Order Date'] = pd.to_datetime(df['Order Date'])
-        df = df[['Order Date', 'Order Item Quantity']].dropna()
-        df = df.rename(columns={"Order Date": "ds", "Order Item Quantity": "y"})
-        df = df.groupby('ds').sum().reset_index()
+    # Deferred so the upload page paints before matplotlib loads
+    import matplotlib.pyplot as plt
 
-        # Add holiday flag using India holidays (customize as needed)
-        ind_holidays = holidays.India()
-        df['holiday'] = df['ds'].apply(lambda x: 1 if x in ind_holidays else 0)
+    file_bytes = uploaded_file.getvalue()
 
-        # Prophet model with holidays as regressor
-        m = Prophet()
-        m.add_regressor('holiday')
-        m.fit(df)
-
-        future = m.make_future_dataframe(periods=30)
-        future['holiday'] = future['ds'].apply(lambda x: 1 if x in ind_holidays else 0)
-
-        forecast = m.predict(future)
+    try:
+        m = fit_prophet(file_bytes)
+        forecast = predict_demand(file_bytes)
 
         # Plot forecast
         st.subheader("Forecast Plot")
         fig1 = m.plot(forecast)
         st.pyplot(fig1)
+        plt.close(fig1)
 
         st.subheader("Forecast Components")
         fig2 = m.plot_components(forecast)
         st.pyplot(fig2)
+        plt.close(fig2)
 
         st.subheader("Forecasted Data")
         st.dataframe(forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(30).round(2))